@@ -28,12 +28,20 @@ Description:
     - Option to select configs to run in jobs (mostly for multi-fit support)
     - Possibility to run ranking jobs per systematic
 
+ - v2.2 New features:
+    - Submission via the htcondor python bindings (if available) in a single schedd transaction instead of spawning
+      `condor_submit`
+    - Jobs split by region and systematic are submitted as a DAG with one `hupdate` merge job per region, which runs
+      once all systematics jobs of its region have finished
+    - Configs are parsed concurrently, as parsing is dominated by file access on (network) filesystems
+    - Parsed regions and systematics are cached in the work directory and re-used for unchanged configs
+    - Jobs are grouped by a batch name in `condor_q` and can optionally be late-materialized (`--max-materialize`)
+    - Jobs can inherit the submission environment (`--getenv`) to skip sourcing the TRExFitter setup if possible
+
 
  TODO: Nice to haves:
     - Add deployment possibilities via tarballs for batch systems where submit and worker nodes do not share a
       filesystem
-    - Convert submission scripts to DAG for automatic hupdate jobs with split systematics
-    - Use htcondor API library for job submission directly instead of using subprocess
     - Add ability to submit Bootstrap jobs
     - Add ability to submit group impacts (via SubCategory option in syst blocks)
 """
@@ -41,14 +49,26 @@ Description:
 import tempfile
 import sys
 import os
-import subprocess
 import stat
+import subprocess
+import time
 import shutil
 import re
+import json
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from difflib import get_close_matches
+from functools import lru_cache
+from itertools import islice
 
 # Used for type deduction in the docs
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple
+
+# The htcondor python bindings are optional, we fall back to `condor_submit` if they are not installed
+try:
+    import htcondor
+except ImportError:
+    htcondor = None
 
 
 class TRExSubmit:
@@ -67,6 +87,10 @@ class TRExSubmit:
         num_syst_per_job: int = 20,
         extra_opts: list = None,
         run_time: int = None,
+        strict: bool = False,
+        max_materialize: int = None,
+        max_jobs_per_second: float = None,
+        getenv: bool = False,
     ) -> None:
         """Init the class and setup all variables.
 
@@ -102,11 +126,33 @@ class TRExSubmit:
             no such options are supplied, by default None
         run_time : int, optional
             Non-standard run-time to be requested for the jobs, by default None
+        strict : bool, optional
+            Whether to abort (`True`) or only warn (`False`) if a config lists the
+            same systematic more than once within a single entry, by default False
+        max_materialize : int, optional
+            Maximum number of jobs the schedd should materialize at once from the
+            submit file. By default, all jobs are materialized at submission,
+            by default None
+        max_jobs_per_second : float, optional
+            Maximum rate at which jobs are submitted to the schedd. If set, jobs are
+            submitted in chunks spaced accordingly (not applicable for DAGs). By
+            default, all jobs are submitted at once, by default None
+        getenv : bool, optional
+            Whether jobs should inherit the environment of the submission (`True`),
+            in which case the TRExFitter setup is only sourced on the worker node if
+            TRExFitter is not already available from it, or not (`False`), by default
+            False
         """
-        self.config_list = config_list
+        self.config_list = (
+            self._check_deduplicate_configs(config_list) if config_list is not None else None
+        )
         self.trex_folder = trex_folder
         self.work_dir = work_dir
         self.run_time = run_time
+        self.strict = strict
+        self.max_materialize = max_materialize
+        self.max_jobs_per_second = max_jobs_per_second
+        self.getenv = getenv
 
         # Already define the subdirectories
         self.script_dir = os.path.join(self.work_dir, self.SUB_DIRS["scripts"])
@@ -116,22 +162,8 @@ class TRExSubmit:
         self.config_dir = os.path.join(self.work_dir, self.SUB_DIRS["configs"])
         self.workspace_dir = os.path.join(self.work_dir, self.SUB_DIRS["results"])
 
-        # Build the regex expressions needed later on
-        # Rep-file: Take everything up to comments and trim whitespace in the path, disregard quotes
-        self._file_regex = re.compile(
-            "^\s*(?P<key>[\w-]+)\s*:\s*(?P<value>[^#%]*[^\s#%])[\s#%]*"  # noqa W605
-        )
-        # Other keys: Allow quote-escaping of value and add key and quote groups with logic for retrieval
-        self._key_regex = re.compile(
-            '^\s*(?P<key>[\w-]+)\s*:\s*(?P<quote>")?'                        # noqa W605
-            '(?P<value>(?(quote)[^"]+|[^"#%]*[^"\s#%]))(?(quote)"|)[\s#%]*'  # noqa W605
-        )
-
-        # Make the work directory (pass if it's already present but fail if the parent directory is not there)
-        try:
-            os.mkdir(self.work_dir)
-        except FileExistsError:
-            pass
+        # Make the work directory (pass if it's already present)
+        os.makedirs(self.work_dir, exist_ok=True)
 
         # Read actions and make sure the `n` or 'b' step is executed alone only to not have thousands of job failures from this
         self.actions = actions
@@ -147,11 +179,26 @@ class TRExSubmit:
             )
             sys.exit(1)
 
+        # The files generated for the submission only depend on the actions, so their paths can be fixed right away
+        self.job_file = os.path.join(self.script_dir, f"job_arguments_{self.actions}.txt")
+        self.script_file = os.path.join(self.script_dir, f"script_{self.actions}.sh")
+        self.submit_file = os.path.join(self.script_dir, f"submit_{self.actions}.sub")
+        self.dag_file = os.path.join(self.script_dir, f"dag_{self.actions}.dag")
+
         # Logic-OR whether to integrate configs and results
         self.integrate_everything = self._check_update_integrate_cachefile(
             integrate_everything
         )
         self.config_region_syst_dict = None
+        # Whether a selection of configs to run was supplied explicitly (see `build_and_submit`)
+        self.config_selection = False
+        # Parsed regions and systematics per config (with the modification times of all files they were built from),
+        # so unchanged configs are only read once (also persisted in the work directory, see `_load_parse_cache`)
+        self._parse_cache = {}
+        # Keys of the parse results used in this run (only these are persisted) and configs whose duplicate
+        # systematics were already reported in this run
+        self._parse_cache_used = set()
+        self._reported_duplicate_systs = {}
 
         # Check if we got any configs if we don't integrate
         if not self.integrate_everything and not self.config_list:
@@ -181,25 +228,84 @@ class TRExSubmit:
         )
         self.split_scan = split_scan if "x" in self.actions else False
         self.num_syst_per_job = num_syst_per_job if self.split_systs else None
-        self.extra_opts = [extra_opts] if isinstance(extra_opts, str) else extra_opts
+        # Always keep extra options as a list (and make sure we don't split up strings later)
+        if extra_opts is None:
+            self.extra_opts = []
+        elif isinstance(extra_opts, str):
+            self.extra_opts = [extra_opts]
+        else:
+            self.extra_opts = list(extra_opts)
+
+        self.granularity = self._get_granularity()
+
+    @staticmethod
+    def _check_deduplicate_configs(config_list: list) -> list:
+        """Checks that all configs exist and removes configs supplied more than once
+
+        Every config is only looked up once, before any work is done, so a wrong path
+        is reported right away instead of only once parsing reaches it. Configs are
+        compared by their resolved paths, so the same config supplied via different
+        (e.g. relative and absolute) paths or symlinks only yields one set of jobs
+        instead of duplicated submissions.
+
+        Parameters
+        ----------
+        config_list : list
+            List of config files as supplied by the user.
+
+        Returns
+        -------
+        list
+            Config list without duplicates, keeping the first occurrence of each config.
+        """
+        seen_configs = set()
+        unique_config_list = []
+        for config in config_list:
+            if not os.path.isfile(config):
+                print(
+                    f"\033[31mERROR: Cannot find '{config}'!\033[0m",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+
+            real_config = os.path.realpath(config)
+            if real_config in seen_configs:
+                print(
+                    f"\033[33mWARNING: Config '{config}' was supplied more than once and will "
+                    f"only be submitted once!\033[0m",
+                    file=sys.stderr,
+                )
+                continue
+            seen_configs.add(real_config)
+            unique_config_list.append(config)
+
+        return unique_config_list
 
-        # Build the correct key for the granularity-dict
-        self.granularity = "global"
+    def _get_granularity(self) -> str:
+        """Builds the correct key for the granularity-dicts from the job splits
+
+        Returns
+        -------
+        str
+            Key of `GRANULARITY_ARGS` and `BATCH_SCRIPT_ARGS` matching the job splits.
+        """
         if self.split_regions and not self.split_systs:
-            self.granularity = "region"
+            return "region"
         elif self.split_regions and self.split_systs:
-            self.granularity = "syst"
+            return "syst"
         elif not self.split_regions and self.split_systs:
-            self.granularity = "ranking"
+            return "ranking"
         elif self.split_scan:
-            self.granularity = "lhscan"
+            return "lhscan"
+        return "global"
 
     def build_and_submit(
         self,
         config_list: list,
         dry_run: bool = False,
         stage_out_results=False,
-    ) -> None:
+        async_submit: bool = False,
+    ) -> Optional[subprocess.Popen]:
         """Execute the job submission.
 
         Uses the values supplied during initialisation to generate HTCondor submit
@@ -219,6 +325,17 @@ class TRExSubmit:
             (`True`, in case access point and worker node don't share a filesystem)
             or not (`False`). By default, no need to stage out results is assumed,
             by default False
+        async_submit : bool, optional
+            Whether to run `condor_submit` in the background and hand back its process
+            (`True`) or to replace the current process by it (`False`). This allows
+            drivers to overlap submissions of several `TRExSubmit` objects. Only
+            relevant if the htcondor python bindings are not available, by default False
+
+        Returns
+        -------
+        Optional[subprocess.Popen]
+            The running `condor_submit` process for asynchronous submissions via the
+            command line, otherwise `None`.
         """
 
         if not self.integrate_everything and config_list is not None:
@@ -231,24 +348,30 @@ class TRExSubmit:
 
         elif config_list is not None:
             self._match_update_config_list(config_list)
+            self.config_selection = True
 
-        # Associate regions and systematics with config files (and check that we only have each region once)
+        # Associate regions and systematics with config files (and check that we only have each region once), re-using
+        # the results of previous runs for unchanged configs
+        self._load_parse_cache()
         self.config_region_syst_dict = self._get_config_region_syst_dict(
             self.config_list,
         )
+        self._save_parse_cache()
         # Now check that we have at least one systematic - or disable the split by systematics
         self._check_update_systematic_split(self.config_region_syst_dict)
 
-        os.makedirs(self.script_dir, exist_ok=True)
-        os.makedirs(self.log_dir, exist_ok=True)
+        # Create all required subdirectories in one go (the work directory itself already exists at this point)
+        required_dirs = [self.script_dir, self.log_dir]
         if self.integrate_everything:
-            os.makedirs(self.workspace_dir, exist_ok=True)
+            required_dirs.append(self.workspace_dir)
+        for required_dir in required_dirs:
+            os.makedirs(required_dir, exist_ok=True)
 
         condor_result_dir = self.workspace_dir if stage_out_results else None
 
-        job_file = os.path.join(self.script_dir, f"job_arguments_{self.actions}.txt")
-        script_file = os.path.join(self.script_dir, f"script_{self.actions}.sh")
-        submit_file = os.path.join(self.script_dir, f"submit_{self.actions}.sub")
+        job_file = self.job_file
+        script_file = self.script_file
+        submit_file = self.submit_file
 
         self._build_job_file(
             config_region_syst_dict=self.config_region_syst_dict,
@@ -267,16 +390,177 @@ class TRExSubmit:
             result_dir=condor_result_dir,
             granularity=self.granularity,
             run_time=self.run_time,
+            max_materialize=self.max_materialize,
         )
 
+        # Jobs split by systematics need merging per region, so let DAGMan take care of that
+        # (only possible if the histograms stay on a shared filesystem)
+        dag_file = None
+        if self.granularity == "syst" and condor_result_dir is None:
+            dag_file = self.dag_file
+            try:
+                self._build_merge_dag(
+                    dag_path=dag_file,
+                    job_file=job_file,
+                    script_path=script_file,
+                )
+            except KeyError as error:
+                # Without the job name we do not know which histograms to merge, but the jobs can still run
+                print(
+                    f"\033[33mWARNING: {error.args[0]} Not merging histograms automatically, "
+                    f"submitting '{submit_file}' instead of a DAG.\033[0m",
+                    file=sys.stderr,
+                )
+                dag_file = None
+
         if dry_run:
             print(f"INFO: In dry-run, submit files can be found in {self.work_dir}")
+            if dag_file is not None:
+                print(f"      Submit '{dag_file}' with condor_submit_dag to merge histograms automatically")
         else:
             print(f"INFO: Submitting jobs...")
-            proc = subprocess.run(
-                ["condor_submit", submit_file], stdout=sys.stdout, stderr=sys.stderr
-            )
-            sys.exit(proc.returncode)
+            if self.max_jobs_per_second is not None and dag_file is not None:
+                print(
+                    "\033[33mWARNING: Not limiting the submission rate of the DAG, "
+                    "DAGMan throttles the submission of its jobs itself.\033[0m",
+                    file=sys.stderr,
+                )
+            elif self.max_jobs_per_second is not None and async_submit:
+                print(
+                    "\033[33mWARNING: Submitting the jobs at a limited rate in the foreground "
+                    "instead of asynchronously.\033[0m",
+                    file=sys.stderr,
+                )
+
+            if self.max_jobs_per_second is not None and dag_file is None:
+                self._submit_rate_limited(
+                    job_file=job_file,
+                    script_file=script_file,
+                    result_dir=condor_result_dir,
+                )
+            elif htcondor is not None:
+                self._submit_with_bindings(submit_file, dag_file)
+            else:
+                submit_cmd = (
+                    ["condor_submit", submit_file]
+                    if dag_file is None
+                    else ["condor_submit_dag", dag_file]
+                )
+                if async_submit:
+                    # Leave waiting for the submission to the caller
+                    return subprocess.Popen(submit_cmd)
+
+                # Nothing left to do for us, so replace this process by condor_submit instead of forking
+                # (flush first, as buffered output would otherwise be lost with the python process image)
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os.execvp(submit_cmd[0], submit_cmd)
+
+    @staticmethod
+    def _submit_with_bindings(submit_file: str, dag_file: str = None) -> None:
+        """Submits the jobs of a submit file via the htcondor python bindings
+
+        All jobs described by the queue statement of the submit file are pushed
+        to the local schedd within a single transaction, without spawning a
+        `condor_submit` process. If a DAG is supplied, the DAGMan job for it
+        is submitted instead.
+
+        Parameters
+        ----------
+        submit_file : str
+            Filepath of the HTCondor submit file to submit.
+        dag_file : str, optional
+            Filepath of a DAG wrapping the jobs of `submit_file`, which is then
+            submitted instead, by default None
+        """
+        if dag_file is not None:
+            submit_description = htcondor.Submit.from_dag(dag_file, {})
+        else:
+            with open(submit_file) as f:
+                submit_description = htcondor.Submit(f.read())
+
+        schedd = htcondor.Schedd()
+        # A count of 0 makes the schedd use the queue statement of the description
+        result = schedd.submit(submit_description, count=0)
+        print(
+            f"INFO: {result.num_procs()} job(s) submitted to cluster {result.cluster()}."
+        )
+
+    def _submit_rate_limited(
+        self,
+        job_file: str,
+        script_file: str,
+        result_dir: str = None,
+    ) -> None:
+        """Submits the jobs in chunks, spaced such that the requested submission rate is not exceeded
+
+        The job file is read in chunks of `RATE_LIMIT_CHUNK_SIZE` jobs (or fewer,
+        so that a chunk does not exceed the jobs of one second), each of which
+        gets its own job and submit file (next to the full ones, removed again
+        once submitted) and is submitted as a separate cluster.
+
+        Parameters
+        ----------
+        job_file : str
+            Filepath of the file containing argument information for all jobs.
+        script_file : str
+            Filepath of the bash-script to be executed on the worker node(s).
+        result_dir : str, optional
+            Path to the folder into which results should be transferred if no
+            shared filesystem between access point and worker nodes is available,
+            by default None
+        """
+        # Keep chunks within the jobs allowed per second, so that the rate also holds within each second
+        chunk_size = max(1, min(self.RATE_LIMIT_CHUNK_SIZE, int(self.max_jobs_per_second)))
+        print(
+            f"INFO: Submitting jobs in chunks of up to {chunk_size} job(s) "
+            f"at no more than {self.max_jobs_per_second:g} job(s) per second"
+        )
+
+        job_file_base = os.path.splitext(job_file)[0]
+        submit_file_base = os.path.splitext(self.submit_file)[0]
+        # Only ever hold one chunk of the job file in memory
+        with open(job_file) as f:
+            chunk_index = 0
+            chunk_lines = list(islice(f, chunk_size))
+            while chunk_lines:
+                chunk_job_file = f"{job_file_base}_{chunk_index:04d}.txt"
+                chunk_submit_file = f"{submit_file_base}_{chunk_index:04d}.sub"
+                with open(chunk_job_file, "w") as chunk_f:
+                    chunk_f.writelines(chunk_lines)
+                self._write_htc_submit(
+                    submit_file_path=chunk_submit_file,
+                    script_path=script_file,
+                    job_file=chunk_job_file,
+                    log_dir=self.log_dir,
+                    result_dir=result_dir,
+                    granularity=self.granularity,
+                    run_time=self.run_time,
+                    max_materialize=self.max_materialize,
+                )
+
+                if htcondor is not None:
+                    self._submit_with_bindings(chunk_submit_file)
+                else:
+                    proc = subprocess.run(["condor_submit", chunk_submit_file])
+                    if proc.returncode != 0:
+                        print(
+                            f"\033[31mERROR: Submission of '{chunk_submit_file}' failed! "
+                            f"Chunks before it have already been submitted.\033[0m",
+                            file=sys.stderr,
+                        )
+                        sys.exit(proc.returncode)
+
+                # The jobs are queued with the schedd now, so the chunk files are not needed anymore
+                os.remove(chunk_job_file)
+                os.remove(chunk_submit_file)
+
+                # Space out the submissions by the time this chunk should take
+                num_chunk_jobs = len(chunk_lines)
+                chunk_lines = list(islice(f, chunk_size))
+                if chunk_lines:
+                    time.sleep(num_chunk_jobs / self.max_jobs_per_second)
+                chunk_index += 1
 
     def _check_update_integrate_cachefile(self, cli_flag: bool) -> bool:
         """Checks whether integration of configs and results should be performed
@@ -336,6 +620,75 @@ class TRExSubmit:
 
         return integration_flag
 
+    def _get_parse_cachefile(self) -> str:
+        """Builds the path of the parse cache in the work directory
+
+        Parse results depend on the actions (e.g. nuisance parameter handling for
+        rankings), so each set of actions gets its own cache.
+
+        Returns
+        -------
+        str
+            Path of the parse cache for the current actions.
+        """
+        return os.path.join(self.work_dir, f".parse_{self.actions}.cache")
+
+    def _load_parse_cache(self) -> None:
+        """Loads config parse results of previous runs from the work directory
+
+        Entries are only used if the configs (and their nested configs) are unchanged,
+        which is checked in `_parse_config` as for results of this run. A missing or
+        unreadable cache, or one written in another format (e.g. by an older version
+        of this script or edited by hand), is simply ignored as a whole.
+        """
+        try:
+            with open(self._get_parse_cachefile()) as f:
+                cache = json.load(f)
+        except (OSError, ValueError):
+            return
+
+        cache_entries = {}
+        try:
+            if cache["version"] != self.PARSE_CACHE_VERSION:
+                return
+            for entry in cache["entries"]:
+                cache_key = (entry.pop("config"), entry.pop("need_systs"))
+                # Check the shape of the entry, so that a broken cache cannot fail the parsing later on
+                if (
+                    entry.keys() != self.PARSE_CACHE_ENTRY_KEYS
+                    or not isinstance(entry["regions"], list)
+                    or not isinstance(entry["systs"], list)
+                    or not isinstance(entry["dependencies"], dict)
+                    or not isinstance(entry["duplicate_systs"], dict)
+                ):
+                    return
+                cache_entries[cache_key] = entry
+        except (KeyError, TypeError, AttributeError):
+            return
+
+        for cache_key, entry in cache_entries.items():
+            # Results of this run take precedence
+            self._parse_cache.setdefault(cache_key, entry)
+
+    def _save_parse_cache(self) -> None:
+        """Stores the config parse results in the work directory for subsequent runs
+
+        Only results used in this run are stored, so that configs which are not
+        submitted anymore (or do not exist anymore) are dropped from the cache.
+        """
+        cache_entries = [
+            {"config": config, "need_systs": need_systs, **result}
+            for (config, need_systs), result in self._parse_cache.items()
+            if (config, need_systs) in self._parse_cache_used
+        ]
+
+        # Write to a temporary file first, so that concurrent or aborted runs never leave a broken cache behind
+        cachefile = self._get_parse_cachefile()
+        temp_file_handle, temp_file_path = tempfile.mkstemp(dir=self.work_dir)
+        with open(temp_file_handle, "w") as f:
+            json.dump({"version": self.PARSE_CACHE_VERSION, "entries": cache_entries}, f)
+        os.replace(temp_file_path, cachefile)
+
     def _get_config_region_syst_dict(
         self,
         config_list: list,
@@ -346,10 +699,14 @@ class TRExSubmit:
         The dictionary returned by this function has the following form:
         ```
             <config1>: {regions: [<region1>, <region2>, ..., <regionN>],
-                        systs: [<syst1.1>, <syst1.2>, ...]},
-            <config2>: {regions: [<regionN+1>, ...], systs: [<syst2.1,>, ...]},
+                        systs: [<syst1.1>, <syst1.2>, ...],
+                        short_config: <short_config1>},
+            <config2>: {regions: [<regionN+1>, ...], systs: [<syst2.1,>, ...],
+                        short_config: <short_config2>},
             ...
         ```
+        Here, the short config name is the config filename without extension
+        and with `.` replaced by `_`, as used for job arguments and logs.
 
         The function raises an error if some region is present in multiple
         configs, as this will mess up ntuple-histogram conversion.
@@ -373,207 +730,392 @@ class TRExSubmit:
         region_check_set = set()
         config_region_syst_dict = {}
 
-        for config in config_list:
-            config_regions = self._get_region_list(config)
-            config_systs = self._get_syst_list(config)
+        # Parsing is dominated by file access (e.g. on network filesystems), so read all configs concurrently
+        num_threads = max(1, min(self.MAX_PARSE_THREADS, len(config_list)))
+        # Systematics are only needed if we split jobs by them
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            parse_results = list(
+                executor.map(
+                    lambda config: self._parse_config(config, need_systs=self.split_systs),
+                    config_list,
+                )
+            )
+
+        for config, (config_regions, config_systs) in zip(config_list, parse_results):
+            self._print_config_summary(
+                config, config_regions, config_systs, show_systs=self.split_systs
+            )
 
-            # Use sets for checking intersections for complexity - empty set evaluates as `False`
-            region_intersection = region_check_set & set(config_regions)
-            if region_intersection:
+            # Use sets for checking intersections for complexity - only build the intersection (for the error
+            # message) if there is a collision at all
+            config_region_set = set(config_regions)
+            if not region_check_set.isdisjoint(config_region_set):
+                region_intersection = region_check_set & config_region_set
                 raise RuntimeError(
                     f"Regions {list(region_intersection)} in '{config}' were already present!"
                 )
 
             # Add the new regions to our check_set
-            region_check_set |= set(config_regions)
+            region_check_set |= config_region_set
 
             # Now add all to the overall dict
             config_region_syst_dict[config] = {
                 "regions": config_regions,
                 "systs": config_systs,
+                "short_config": self._get_short_config_name(config),
             }
 
         return config_region_syst_dict
 
-    def _get_region_list(
+    @staticmethod
+    @lru_cache(maxsize=None)
+    def _get_short_config_name(config: str) -> str:
+        """Derives the short config name used to identify jobs in the job file and logs
+
+        Parameters
+        ----------
+        config : str
+            Path to TRExFitter config.
+
+        Returns
+        -------
+        str
+            Config filename without extension (and dots replaced by underscores).
+        """
+        return os.path.splitext(os.path.basename(config))[0].replace(".", "_")
+
+    def _parse_config(
         self,
         config: str,
-        as_subconfig: bool = False,
-    ) -> List[str]:
-        """Retrieves regions from TRExFitter config
+        need_systs: bool = True,
+    ) -> Tuple[List[str], List[str]]:
+        """Retrieves regions and systematics from TRExFitter config
+
+        Regions and systematics are gathered in the same pass over the config, so
+        every config (and nested config) is only opened and scanned once. Results
+        are cached for as long as neither the config nor its nested configs are
+        modified.
 
         Parameters
         ----------
         config : str
             Path to TRExFitter config.
-        as_subconfig : bool, optional
-            Whether this function is called for a nested config from another config
-            (`True`) or not (`False`), by default False
+        need_systs : bool, optional
+            Whether to gather systematics (`True`) or only regions (`False`), in
+            which case an empty list of systematics is returned, by default True
 
         Returns
         -------
-        List[str]
-            List of regions in config and included configs.
+        Tuple[List[str], List[str]]
+            Lists of regions and systematics in config and included configs.
         """
+        # Re-use previous results as long as neither the config nor any of its nested configs were modified
+        cache_key = (config, need_systs)
+        cached_result = self._parse_cache.get(cache_key)
+        if cached_result is not None and self._check_parse_dependencies(cached_result["dependencies"]):
+            # The results of the nested configs are still needed in case this config changes
+            self._parse_cache_used.update((dependency, need_systs) for dependency in cached_result["dependencies"])
+            self._report_duplicate_systs(cached_result["duplicate_systs"])
+            return cached_result["regions"], cached_result["systs"]
+        self._parse_cache_used.add(cache_key)
+
+        # Take the modification time before reading, so that changes while parsing invalidate the result
+        dependencies = {config: os.stat(config).st_mtime_ns}
+
         tmp_region_list = []
+        tmp_syst_list = []
         sub_config_list = []
+        # Only the fit block of the config itself defines the steps of the likelihood scan
+        lhscan_steps = None
+        # The job block may also be (partially) defined in nested configs, see below
+        job_name = None
+        output_dir = None
+
+        # Read in binary mode and scan the whole config at once, only decoding the values we actually keep
+        with open(config, "rb") as f:
+            config_buffer = f.read()
+
+        # Use caching variable for number of systematics to remove in case of NuisanceParameter entries
+        last_syst_cache_size = 0
+        # Systematics listed more than once within the same entry (e.g. `Systematic: A;B;A`), most likely a mistake -
+        # repeating a systematic in separate blocks (e.g. with different samples) is fine and merged silently
+        duplicate_systs = set()
+
+        for key_match in self.CONFIG_SCAN_REGEX.finditer(config_buffer):
+            key = key_match["key"]
+            value = key_match["value"].strip()
+
+            if key == b"LHscanSteps":
+                # Kept as given, it is only converted if it is actually needed (see `_get_lhscan_steps`)
+                if lhscan_steps is None and self._get_block_key(config_buffer, key_match.start()) == b"Fit":
+                    lhscan_steps = self._decode_single_value(value)
+                continue
+            elif key == b"Job":
+                if job_name is None:
+                    job_name = self._decode_single_value(value)
+                continue
+            elif key == b"OutputDir":
+                if output_dir is None:
+                    output_dir = self._decode_single_value(value)
+                continue
+            elif key in (b"Region", b"INCLUDE", b"ConfigFile"):
+                single_value = self._decode_single_value(value)
+                if not single_value:
+                    continue
 
-        with open(config) as conf:
-            for line in conf:
-                file_match = self._file_regex.search(line)
-                key_match = self._key_regex.search(line)
-
-                if key_match is not None and key_match['key'] == "Region":
-                    tmp_region_list.append(key_match['value'])
-                elif file_match is not None and file_match['key'] == "INCLUDE":
+                if key == b"Region":
+                    tmp_region_list.append(single_value)
+                elif key == b"INCLUDE" or "m" in self.actions:
+                    # Included configs and (for multi-fits) subconfigs are added into this config
                     sub_config_list.append(
-                        os.path.abspath(os.path.join(os.path.dirname(config), file_match['value']))
+                        os.path.abspath(os.path.join(os.path.dirname(config), single_value))
                     )
-                elif (
-                    'm' in self.actions
-                    and key_match is not None
-                    and key_match['key'] == "ConfigFile"
-                ):
-                    # Add in subconfigs into this config
-                    sub_config_list.append(
-                        os.path.abspath(os.path.join(os.path.dirname(config), key_match['value']))
-                    )
-                elif key_match is not None and key_match["key"] == "INCLUDE":
-                    # now also check for any additonal included configs
-                    include_file = os.path.join(self.config_dir, key_match["value"])
-                    include_regions = self._get_region_list(
-                        include_file, as_subconfig=True
-                    )
-                    tmp_region_list.extend(include_regions)
+                continue
+            elif not need_systs:
+                continue
+
+            # Gathering systematics (and background norm factors & deviating NP names for rankings)
+            is_syst = key in (b"Systematic", b"UnfoldingSystematic")
+            is_np = "r" in self.actions and key == b"NuisanceParameter"
+            is_nf = "r" in self.actions and key == b"NormFactor"
+
+            if not is_syst and not is_np and not is_nf:
+                continue
+
+            single_syst_list = []
+            # let's get all the names for multi-systematic defined blocks
+            for syst in value.split(b";"):
+                syst = syst.strip()
+                # remove any quotes
+                if syst.startswith(b'"') and syst.endswith(b'"'):
+                    syst = syst[1:-1]
+                single_syst_list.append(syst.decode())
+
+            if is_syst:
+                # Update the systematics list we use to remove entries
+                # in case we have a NuisanceParameter entry for this systematic
+                last_syst_cache_size = len(single_syst_list)
+                duplicate_systs.update(
+                    syst for syst, count in Counter(single_syst_list).items() if count > 1
+                )
+            elif is_np:
+                # Remove last systematic's entries from the combined list
+                # (under the assumption that a NuisanceParameter will never stand outside a
+                # Systematic or UnfoldingSystematic block!!!)
+                if self.config_selection:
+                    assert len(single_syst_list) == last_syst_cache_size
+                tmp_syst_list = tmp_syst_list[:-last_syst_cache_size]
+            elif is_nf:
+                # Filter out POIs for NormFactors (those should start with 'mu_')
+                single_syst_list = list(
+                    filter(lambda s: not s.startswith("mu_"), single_syst_list)
+                )
 
-        # Use sets here as regions in nested configs may have common regions
+            tmp_syst_list += single_syst_list
+
+        # Keep track of (nested) duplicates, so they are reported (or rejected in strict mode) in every run, even
+        # if the config is not parsed again
+        duplicate_systs = {config: sorted(duplicate_systs)} if duplicate_systs else {}
+        self._report_duplicate_systs(duplicate_systs)
+
+        # Use sets here as regions and systematics in nested configs may be common (and each systematic only
+        # needs one job)
         region_set = set(tmp_region_list)
+        syst_set = set(tmp_syst_list)
 
         for sub_config in sub_config_list:
-            sub_regions = self._get_region_list(sub_config, as_subconfig=True)
+            sub_regions, sub_systs = self._parse_config(sub_config, need_systs=need_systs)
             region_set.update(sub_regions)
+            syst_set.update(sub_systs)
+            sub_result = self._parse_cache[(sub_config, need_systs)]
+            dependencies.update(sub_result["dependencies"])
+            duplicate_systs.update(sub_result["duplicate_systs"])
+            # Nested configs are added into this config, so fill in what this config does not define itself
+            if job_name is None:
+                job_name = sub_result["job_name"]
+            if output_dir is None:
+                output_dir = sub_result["output_dir"]
+
+        regions = sorted(list(region_set))
+        systs = sorted(list(syst_set))
+        self._parse_cache[cache_key] = {
+            "regions": regions,
+            "systs": systs,
+            "lhscan_steps": lhscan_steps,
+            "job_name": job_name,
+            "output_dir": output_dir,
+            "dependencies": dependencies,
+            "duplicate_systs": duplicate_systs,
+        }
+        return regions, systs
+
+    def _report_duplicate_systs(self, duplicate_systs: Dict[str, List[str]]) -> None:
+        """Warns about (or in strict mode aborts for) systematics listed more than once within an entry
 
-        region_list = sorted(list(region_set))
+        Each config is only reported once per run, also if it is parsed (or its
+        parse result is re-used) multiple times.
 
-        if not as_subconfig:
-            print(f"INFO: Regions found in '{config}' (and its nested configs):")
-            for region in region_list:
-                print(f"       - {region}")
+        Parameters
+        ----------
+        duplicate_systs : Dict[str, List[str]]
+            Systematics listed more than once within the same entry, keyed by the
+            (nested) configs they are listed in.
+        """
+        for config, systs in duplicate_systs.items():
+            # `setdefault` only inserts if nobody else did before (atomically, as configs are parsed concurrently)
+            marker = object()
+            if self._reported_duplicate_systs.setdefault(config, marker) is not marker:
+                continue
 
-        return region_list
+            if self.strict:
+                print(
+                    f"\033[31mERROR: Systematics listed more than once within the same entry in '{config}': "
+                    f"{', '.join(systs)}!\033[0m",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
+            print(
+                f"\033[33mWARNING: Systematics listed more than once within the same entry in '{config}' will "
+                f"only be submitted once: {', '.join(systs)}\033[0m",
+                file=sys.stderr,
+            )
 
-    def _get_syst_list(
-        self,
-        config: str,
-        as_subconfig: bool = False,
-    ) -> List[str]:
-        """_summary_
+    @staticmethod
+    def _check_parse_dependencies(dependencies: Dict[str, int]) -> bool:
+        """Checks whether the files a parse result was built from are unchanged
 
         Parameters
         ----------
-        config : str
-            Path to TRExFitter config.
-        as_subconfig : bool, optional
-            Whether this function is called for a nested config from another config
-            (`True`) or not (`False`), by default False
+        dependencies : Dict[str, int]
+            Modification times (in ns) of the config and its nested configs at the
+            time of parsing, keyed by their paths.
 
         Returns
         -------
-        List[str]
-            List of systematics in config.
+        bool
+            Whether all files still exist with unchanged modification times.
         """
-        tmp_syst_list = []
-        sub_config_list = []
-        syst_list_template = "      - {}. {}"
+        try:
+            return all(
+                os.stat(path).st_mtime_ns == mtime for path, mtime in dependencies.items()
+            )
+        except FileNotFoundError:
+            return False
 
-        with open(config) as f:
-            # Use caching variable for number of systematics to remove in case of NuisanceParameter entries
-            last_syst_cache_size = 0
+    @classmethod
+    def _get_block_key(cls, config_buffer: bytes, pos: int) -> Optional[bytes]:
+        """Finds the key of the config block an entry belongs to
 
-            for line in f:
-                file_match = self._file_regex.search(line)
-                key_match = self._key_regex.search(line)
+        Blocks start with an unindented key, which all (indented) entries up to
+        the next unindented key belong to.
 
-                if file_match is not None and file_match['key'] == "INCLUDE":
-                    sub_config_list.append(
-                        os.path.abspath(os.path.join(os.path.dirname(config), key_match['value']))
-                    )
-                    continue
-                elif (
-                    'm' in self.actions
-                    and key_match is not None
-                    and key_match['key'] == "ConfigFile"
-                ):
-                    # Add in subconfigs into this config
-                    sub_config_list.append(
-                        os.path.abspath(os.path.join(os.path.dirname(config), key_match['value']))
-                    )
-                    continue
+        Parameters
+        ----------
+        config_buffer : bytes
+            Contents of the config.
+        pos : int
+            Position of the entry in the contents.
 
-                line = line.split("%")[0].strip()
+        Returns
+        -------
+        Optional[bytes]
+            Key of the block (e.g. `Fit`), or None if the entry precedes all blocks.
+        """
+        block_key = None
+        for block_match in cls.BLOCK_REGEX.finditer(config_buffer, 0, pos):
+            block_key = block_match["key"]
+        return block_key
 
-                if line.startswith("#"):
-                    continue
+    @staticmethod
+    def _decode_single_value(value: bytes) -> str:
+        """Decodes a single-valued config entry as matched by the config scan regex
 
-                # Gathering systematics (and background norm factors & deviating NP names for rankings)
-                is_syst = "Systematic:" in line or "UnfoldingSystematic:" in line
-                is_np = "r" in self.actions and "NuisanceParameter:" in line
-                is_nf = "r" in self.actions and "NormFactor:" in line
+        Parameters
+        ----------
+        value : bytes
+            Raw value of the config entry (already stripped of `%` comments).
 
-                if not is_syst and not is_np and not is_nf:
-                    continue
+        Returns
+        -------
+        str
+            The value without quotes (or trailing `#` comments if unquoted).
+        """
+        value = value.strip()
+        # Allow quote-escaping, otherwise trim trailing comments
+        if value.startswith(b'"'):
+            return value[1:].partition(b'"')[0].decode()
+        return value.partition(b"#")[0].rstrip().decode()
+
+    @staticmethod
+    def _print_config_summary(
+        config: str,
+        regions: List[str],
+        systs: List[str],
+        show_systs: bool = True,
+    ) -> None:
+        """Prints regions and systematics found in TRExFitter config
 
-                syst_line = line.split(":")[1].strip()
-                single_syst_list = []
-                # let's get all the names for multi-systematic defined blocks
-                for syst in syst_line.split(";"):
-                    syst = syst.strip()
-                    # remove any quotes
-                    if syst.startswith('"') and syst.endswith('"'):
-                        syst = syst[1:-1]
-                    single_syst_list.append(syst)
-
-                if is_syst:
-                    # Update the systematics list we use to remove entries
-                    # in case we have a NuisanceParameter entry for this systematic
-                    last_syst_cache_size = len(single_syst_list)
-                elif is_np:
-                    # Remove last systematic's entries from the combined list
-                    # (under the assumption that a NuisanceParameter will never stand outside a
-                    # Systematic or UnfoldingSystematic block!!!)
-                    if args.used_configs:
-                        assert len(single_syst_list) == last_syst_cache_size
-                    tmp_syst_list = tmp_syst_list[:-last_syst_cache_size]
-                elif is_nf:
-                    # Filter out POIs for NormFactors (those should start with 'mu_')
-                    single_syst_list = list(
-                        filter(lambda s: not s.startswith("mu_"), single_syst_list)
-                    )
+        Parameters
+        ----------
+        config : str
+            Path to TRExFitter config.
+        regions : List[str]
+            Regions found in the config.
+        systs : List[str]
+            Systematics found in the config.
+        show_systs : bool, optional
+            Whether to print the systematics (`True`) or not (`False`, e.g. if they
+            were not gathered), by default True
+        """
+        print(f"INFO: Regions found in '{config}' (and its nested configs):")
+        for region in regions:
+            print(f"       - {region}")
 
-                tmp_syst_list += single_syst_list
+        if not show_systs:
+            return
 
-        # Use sets here as to not double-count systematics in nested configs
-        syst_set = set(tmp_syst_list)
+        # Only print systematics if we found any
+        if not systs:
+            print(f"INFO: No systematics found in '{config}'")
+            return
 
-        for sub_config in sub_config_list:
-            sub_systs = self._get_syst_list(sub_config, as_subconfig=True)
-            syst_set.update(sub_systs)
+        print(f"INFO: Systematics found in '{config}' (and its nested configs):")
+        # First figure out the maximum width of the systematic index (so that we align the systematics names)
+        syst_index_width = len(f"{len(systs):d}")
+        syst_list_format = f"      - {{index:>{syst_index_width:d}d}}. {{syst}}"
 
-        syst_list = sorted(list(syst_set))
+        for index, syst in enumerate(systs, start=1):
+            print(syst_list_format.format(index=index, syst=syst))
 
-        # Only print systematics if we found any
-        if not as_subconfig and not syst_list:
-            print(f"INFO: No systematics found in '{config}'")
-        elif not as_subconfig:
-            print(f"INFO: Systematics found in '{config}' (and its nested configs):")
-            # First figure out the maximum width of the systematic index (so that we align the systematics names)
-            syst_index_width = len(f"{len(syst_list):d}")
-            syst_list_format = f"      - {{index:>{syst_index_width:d}d}}. {{syst}}"
+    def _get_region_list(self, config: str) -> List[str]:
+        """Retrieves regions from TRExFitter config
+
+        Parameters
+        ----------
+        config : str
+            Path to TRExFitter config.
 
-            for index, syst in enumerate(syst_list, start=1):
-                print(syst_list_template.format(index, syst))
+        Returns
+        -------
+        List[str]
+            List of regions in config and included configs.
+        """
+        return self._parse_config(config)[0]
 
-        return syst_list
+    def _get_syst_list(self, config: str) -> List[str]:
+        """Retrieves systematics from TRExFitter config
+
+        Parameters
+        ----------
+        config : str
+            Path to TRExFitter config.
+
+        Returns
+        -------
+        List[str]
+            List of systematics in config.
+        """
+        return self._parse_config(config)[1]
 
     def _check_update_systematic_split(
         self,
@@ -598,6 +1140,8 @@ class TRExSubmit:
                     f"      Disabling systematics split in condor jobs..."
                 )
                 self.split_systs = False
+                # Keep the job granularity in line with the job file
+                self.granularity = self._get_granularity()
                 break
 
     def _check_integrate_configs(self, config_list: list) -> None:
@@ -757,11 +1301,9 @@ class TRExSubmit:
         List[str]
             List of cached config files.
         """
-        file_list = [
-            f
-            for f in os.listdir(self.config_dir)
-            if os.path.isfile(os.path.join(self.config_dir, f))
-        ]
+        # The directory entries already know their type, so no extra stat call (and path join) per file is needed
+        with os.scandir(self.config_dir) as entries:
+            file_list = [entry.name for entry in entries if entry.is_file()]
 
         # Now remove all replacement files and return the remainder
         return [
@@ -791,7 +1333,7 @@ class TRExSubmit:
         matches = []
         with open(config_path) as f:
             for line in f:
-                tmp_match = self._file_regex.search(line)
+                tmp_match = self.FILE_REGEX.search(line)
                 if tmp_match is not None and tmp_match['key'] == key:  # Add the path if it matches the key
                     matches.append(tmp_match['value'])
 
@@ -832,8 +1374,8 @@ class TRExSubmit:
             for line in orig_file:
                 # This is where the matching magic happens
                 new_line = line
-                file_match = self._file_regex.search(line)
-                key_match = self._key_regex.search(line)
+                file_match = self.FILE_REGEX.search(line)
+                key_match = self.KEY_REGEX.search(line)
 
                 # No need to check for quotes with ReplacementFiles and INCLUDEs (as of December 2023)
                 if file_match is not None and file_match['key'] == 'ReplacementFile':
@@ -895,49 +1437,23 @@ class TRExSubmit:
         -------
         Dict[str, str]
             List of bundles systematics separated by `,`.
-
-        Raises
-        ------
-        RuntimeError
-            If somehow to many systematics bundles are present.
         """
-        syst_bundles = {}
-        tmp_syst_list = []
-        bundle_counter = 0  # Needed for easily parseable bundles in case of multiple systematics per job
-
         assert (
             self.num_syst_per_job is not None
         ), "Something with the systematics processing has gone very wrong!"
 
-        for syst in systematics_list:
-            if (
-                self.num_syst_per_job == 1
-            ):  # The easy case: Only one systematic per job...
-                syst_bundles[syst] = syst
-                bundle_counter += 1
-                continue
-
-            if len(tmp_syst_list) == self.num_syst_per_job:
-                syst_bundles[f"Syst_group_{bundle_counter:04d}"] = ",".join(
-                    tmp_syst_list
-                )
-                bundle_counter += 1
-                tmp_syst_list.clear()
-            elif len(tmp_syst_list) > self.num_syst_per_job:
-                raise RuntimeError(
-                    "Somehow, we ended up with too many systematics in the bundle here!"
-                )
-
-            tmp_syst_list.append(syst)  # Do not forget the current systematic!
-
-        # Final fill with possible left-over systematics
-        if tmp_syst_list:
-            syst_bundles[f"Syst_group_{bundle_counter:04d}"] = ",".join(tmp_syst_list)
-            bundle_counter += 1
-
-        assert len(syst_bundles) == bundle_counter
+        # The easy case: Only one systematic per job...
+        if self.num_syst_per_job == 1:
+            return {syst: syst for syst in systematics_list}
 
-        return syst_bundles
+        # Otherwise, slice the list into consecutive bundles (the last one may be smaller)
+        bundle_starts = range(0, len(systematics_list), self.num_syst_per_job)
+        return {
+            f"Syst_group_{bundle_counter:04d}": ",".join(
+                systematics_list[start:start + self.num_syst_per_job]
+            )
+            for bundle_counter, start in enumerate(bundle_starts)
+        }
 
     def _match_update_config_list(self, new_list: list) -> None:
         """Matches the current config list with the input list for
@@ -991,6 +1507,9 @@ class TRExSubmit:
     def _get_lhscan_steps(self, config: str) -> int:
         """Extracts LHscanSteps from TRExFitter config.
 
+        The value is gathered while parsing regions and systematics, so the config
+        is not read again for this.
+
         Parameters
         ----------
         config : str
@@ -1001,26 +1520,29 @@ class TRExSubmit:
         int
             Number of steps for the likelihood scan.
         """
+        self._parse_config(config, need_systs=self.split_systs)
+        lhscan_steps = self._parse_cache[(config, self.split_systs)]["lhscan_steps"]
 
-        lhscan_steps = 30  # Default value if LHscanSteps key is not found in config
-        in_fit_section = False
+        if lhscan_steps is not None:
+            try:
+                lhscan_steps = int(lhscan_steps)
+            except ValueError:
+                print(
+                    f"\033[31mERROR: 'LHscanSteps' in the fit block of '{config}' has to be an integer "
+                    f"but is '{lhscan_steps}'!\033[0m",
+                    file=sys.stderr,
+                )
+                sys.exit(1)
 
-        with open(config) as f:
-            for line in f:
-                # Check if we are in the fit block of the config...
-                if line.strip().startswith("Fit:"):
-                    in_fit_section = True
-                elif in_fit_section and line.strip().startswith("LHscanSteps:"):
-                    lhscan_steps = int(line.split(":")[1].strip())
-                    print(
-                        f"INFO: Found {lhscan_steps} steps for the likelihood scan in '{config}'"
-                    )
-                    break  # We found the key, so we can stop looking
-                elif in_fit_section and line.strip() and not line.startswith("  "):
-                    in_fit_section = False
-                    print(
-                        f"INFO: You did not specify 'LHscanSteps' in the fit block of '{config}'. Using default value of 30"
-                    )
+        if lhscan_steps is None:
+            lhscan_steps = 30  # Default value if LHscanSteps key is not found in config
+            print(
+                f"INFO: You did not specify 'LHscanSteps' in the fit block of '{config}'. Using default value of 30"
+            )
+        else:
+            print(
+                f"INFO: Found {lhscan_steps} steps for the likelihood scan in '{config}'"
+            )
 
         return lhscan_steps
 
@@ -1039,42 +1561,45 @@ class TRExSubmit:
         job_filename : str
             Path to the script folder of the output directory.
         """
-        outlines = []
-
-        for config, region_syst_dict in config_region_syst_dict.items():
-            short_config = os.path.splitext(os.path.basename(config))[0].replace(
-                ".", "_"
-            )
-
-            if self.split_regions:
-                for region in region_syst_dict["regions"]:
-                    if self.split_systs:
-                        # Build lists of systematics to be put into each file
-                        for bundle_name, syst_bundle in sorted(
-                            self._make_syst_bundle(region_syst_dict["systs"]).items()
-                        ):
-                            outlines.append(
-                                f"{config} {short_config} {region} {bundle_name} {syst_bundle}"
+        # Stream the lines through a large write buffer instead of joining them in memory first
+        with open(job_filename, "w", buffering=1 << 20) as f:
+            for config, region_syst_dict in config_region_syst_dict.items():
+                short_config = region_syst_dict["short_config"]
+                regions = region_syst_dict["regions"]
+                systs = region_syst_dict["systs"]
+
+                if self.split_regions:
+                    # Bundles are the same for all regions of a config
+                    syst_bundles = (
+                        sorted(self._make_syst_bundle(systs).items())
+                        if self.split_systs
+                        else None
+                    )
+                    for region in regions:
+                        if self.split_systs:
+                            # Build lists of systematics to be put into each file
+                            f.writelines(
+                                f"{config} {short_config} {region} {bundle_name} {syst_bundle}\n"
+                                for bundle_name, syst_bundle in syst_bundles
                             )
-                    else:
-                        outlines.append(f"{config} {short_config} {region}")
-            elif self.split_systs:
-                for bundle_name, syst_bundle in sorted(
-                    self._make_syst_bundle(region_syst_dict["systs"]).items()
-                ):
-                    outlines.append(
-                        f"{config} {short_config} {bundle_name} {syst_bundle}"
+                        else:
+                            f.write(f"{config} {short_config} {region}\n")
+                elif self.split_systs:
+                    f.writelines(
+                        f"{config} {short_config} {bundle_name} {syst_bundle}\n"
+                        for bundle_name, syst_bundle in sorted(
+                            self._make_syst_bundle(systs).items()
+                        )
                     )
 
-            elif self.split_scan:
-                lhscan_steps = self._get_lhscan_steps(config)
-                for step in range(1, lhscan_steps + 1):
-                    outlines.append(f"{config} {short_config} {step}")
-            else:
-                outlines.append(f"{config} {short_config}")
-
-        with open(job_filename, "w") as f:
-            f.write("\n".join(outlines))
+                elif self.split_scan:
+                    lhscan_steps = self._get_lhscan_steps(config)
+                    f.writelines(
+                        f"{config} {short_config} {step}\n"
+                        for step in range(1, lhscan_steps + 1)
+                    )
+                else:
+                    f.write(f"{config} {short_config}\n")
 
     def _write_batch_bash(
         self,
@@ -1095,59 +1620,24 @@ class TRExSubmit:
             `<Option>=<Value>[,<Value2> ...]`. By default, no additional
             options are supplied, by default None
         """
-        # Make sure we don't split up strings later
-        extra_opts = [extra_opts] if isinstance(extra_opts, str) else extra_opts
+        # Everything depending on the job split is fixed by the granularity
+        script_args = self.BATCH_SCRIPT_ARGS[self.granularity]
 
         # Add all options in sequence
-        opts = ["Regions=${region}"] if self.split_regions else []
-        opts += (
-            ["Systematics=${systs}", "SaveSuffix=_${suffix}"]
-            if self.split_systs and self.split_regions
-            else []
-        )
-        opts += (
-            ["Ranking=${systs}"] if self.split_systs and not self.split_regions else []
-        )
-        opts += ["LHscanStep=${steps}"] if self.split_scan else []
-        opts += [] if extra_opts is None else list(extra_opts)
+        opts = list(script_args["options"])
+        opts += [] if extra_opts is None else extra_opts
         option_string = ":".join(opts)
 
-        trex_setup_path = os.path.join(self.trex_folder, "setup.sh")
-
         with open(script_path, "w") as f:
-            f.write("#!/bin/bash\n\n")
-            # Get config (and region and systematic, if applicable), complain if we cannot
             f.write(
-                "config=${1:?Config should be supplied as the first parameter but was not!}\n"
-            )
-            if self.split_regions:
-                f.write(
-                    "region=${2:?Region should be supplied as the second parameter but was not!}\n"
+                self.BATCH_SCRIPT_TEMPLATE.format(
+                    job_params=script_args["params"],
+                    config_dir=self.config_dir,
+                    trex_setup=self._get_trex_setup("trex-fitter"),
+                    actions=actions,
+                    option_string=option_string,
                 )
-            if self.split_systs and self.split_regions:
-                f.write(
-                    "suffix=${3:?Suffix should be supplied as the third parameter but was not!}\n"
-                )
-                f.write(
-                    "systs=${4:?Systematics should be supplied as the fourth parameter but were not!}\n"
-                )
-            if self.split_systs and not self.split_regions:
-                f.write(
-                    "systs=${2:?Systematics should be supplied as the second parameter but were not!}\n"
-                )
-            if self.split_scan:
-                f.write(
-                    "steps=${2:?Step should be supplied as the second parameter but was not!}\n"
-                )
-            f.write("\n")
-            f.write(
-                f"cd {self.config_dir}\n"
-            )  # Make the relative config paths work for us
-            f.write(f"source {trex_setup_path}\n")
-            # We should now have `trex-fitter` in our PATH, so can simply call it directly
-            f.write(f'trex-fitter {actions} ${{config}} "{option_string}"\n')
-            f.write("pwd\n")
-            f.write("ls -l\n")
+            )
 
         # Lastly, we also have to make the script executable
         os.chmod(
@@ -1155,11 +1645,30 @@ class TRExSubmit:
             stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH,
         )
 
+    def _get_trex_setup(self, executable: str) -> str:
+        """Builds the bash-script line setting up TRExFitter on the worker node
+
+        Parameters
+        ----------
+        executable : str
+            TRExFitter executable the script is going to call.
+
+        Returns
+        -------
+        str
+            Line sourcing the TRExFitter setup. If jobs inherit the environment of the
+            submission, the setup is skipped if `executable` is already available.
+        """
+        trex_setup_path = os.path.join(self.trex_folder, "setup.sh")
+        if self.getenv:
+            return f"command -v {executable} > /dev/null || source {trex_setup_path}\n"
+        return f"source {trex_setup_path}\n"
+
     def _write_htc_submit(
         self,
         submit_file_path: str,
         script_path: str,
-        job_file: str,
+        job_file: Optional[str],
         log_dir: str,
         result_dir: str = None,
         granularity: str = "global",
@@ -1167,6 +1676,8 @@ class TRExSubmit:
         run_time: int = None,
         num_cpu: int = None,
         universe: str = "vanilla",
+        log_tag: str = None,
+        max_materialize: int = None,
     ) -> None:
         """Generates an HTCondor submission file
 
@@ -1176,9 +1687,10 @@ class TRExSubmit:
             Filepath of the HTCondor submit file to be generated.
         script_path : str
             Filepath of the bash-script to be executed on the worker node(s).
-        job_file : str
+        job_file : str | None
             Filepath of the file containing argument information for the
-            individual jobs.
+            individual jobs. If `None`, a single job is queued and its arguments
+            have to be defined elsewhere (e.g. via `VARS` in a DAG).
         log_dir : str
             Path to the folder in which logs should be saved.
         result_dir : str, optional
@@ -1203,6 +1715,13 @@ class TRExSubmit:
         universe : str, optional
             Universe to run the HTCondor jobs in. By default, `vanilla` universe is
             used, by default "vanilla"
+        log_tag : str, optional
+            Tag to identify the jobs by in the log file names. By default, the
+            TRExFitter actions are used, by default None
+        max_materialize : int, optional
+            Maximum number of jobs the schedd materializes at once from the queue
+            statement (late materialization). By default, all jobs are materialized
+            at submission, by default None
 
         Raises
         ------
@@ -1219,89 +1738,308 @@ class TRExSubmit:
         # Build arguments (first cluster and job ID, then possible arguments from the job_file, then anything else)
         arguments = [arguments] if isinstance(arguments, str) else arguments
 
-        # Need all arguments coming from the file containing them
-        job_file_args = self.GRANULARITY_ARGS[granularity]["job_file"]
+        # Derive all argument strings from the granularity in one go: arguments read from the `job_file`, arguments
+        # passed on to the bash-script (no need for the ShortConfig there) and arguments identifying the job in the
+        # logs (no need for the full Config path there)
+        granularity_args = self.GRANULARITY_ARGS[granularity]
+        job_file_args = granularity_args["job_file"]
+        submit_arg_string = " ".join(
+            (
+                *(f"$({value})" for value in granularity_args["script_args"]),
+                *(() if arguments is None else arguments),
+            )
+        )
+        log_job_options = ".".join(f"$({value})" for value in granularity_args["log_args"])
+
+        # All log files share the same prefix, only join the path once
+        log_tag = self.actions if log_tag is None else log_tag
+        log_prefix = os.path.join(log_dir, f"TRExFitter.{log_tag}.$(ClusterId)")
+        log_path = f"{log_prefix}.log"
+        out_path = f"{log_prefix}.$(ProcId).{log_job_options}.out"
+        err_path = f"{log_prefix}.$(ProcId).{log_job_options}.err"
+
+        # Optional parts of the submit file: only transfer files if needed
+        transfer_settings = ""
+        if result_dir is not None:
+            transfer_settings = (
+                f"\ninitialdir = {result_dir}\n"
+                "should_transfer_files = YES\n"
+                "when_to_transfer_output = ON_EXIT\n\n"
+            )
 
-        # We don't need the ShortConfig for the bash-scripts
-        job_option_args = self.GRANULARITY_ARGS[granularity]["script_args"]
-        job_option_args = [f"$({value})" for value in job_option_args]
+        # Add explicitly supplied requirements
+        resource_requests = ""
+        if run_time is not None:
+            # Not sure if this is a standard requirement as mandated by HTCondor...
+            resource_requests += f"+RequestRuntime = {run_time:d}\n"
+        if num_cpu is not None:
+            resource_requests += f"RequestCpus = {num_cpu:d}\n"
 
-        submit_args = job_option_args
-        submit_args += [] if arguments is None else arguments
-        submit_arg_string = " ".join(submit_args)
+        materialize_setting = (
+            "" if max_materialize is None else f"max_materialize = {max_materialize:d}\n"
+        )
 
-        # We don't want the full Config path for the logs
-        log_job_args = self.GRANULARITY_ARGS[granularity]["log_args"]
-        log_job_args = [f"$({value})" for value in log_job_args]
-        log_job_options = ".".join(log_job_args)
+        # Finally, the job queue statement (with arguments read in from `job_file` if there is one)
+        queue_statement = (
+            "queue" if job_file is None else f"queue {', '.join(job_file_args)} from {job_file}"
+        )
 
-        log_path = os.path.join(log_dir, f"TRExFitter.{self.actions}.$(ClusterId).log")
-        out_path = os.path.join(
-            log_dir,
-            f"TRExFitter.{self.actions}.$(ClusterId).$(ProcId).{log_job_options}.out",
+        with open(submit_file_path, "w") as f:
+            f.write(
+                self.SUBMIT_TEMPLATE.format(
+                    universe=universe,
+                    executable=script_path,
+                    arguments=submit_arg_string,
+                    log=log_path,
+                    output=out_path,
+                    error=err_path,
+                    transfer_settings=transfer_settings,
+                    resource_requests=resource_requests,
+                    batch_name=f"TRExFit_{self.actions}",
+                    materialize_setting=materialize_setting,
+                    getenv_setting="getenv = True\n" if self.getenv else "",
+                    queue_statement=queue_statement,
+                )
+            )
+
+    def _get_job_info(self, config: str) -> Tuple[str, str]:
+        """Retrieves the job name and output directory from TRExFitter config
+
+        Both are gathered (also from included configs) while parsing regions and
+        systematics, so the config is not read again for this.
+
+        Parameters
+        ----------
+        config : str
+            Path to TRExFitter config.
+
+        Returns
+        -------
+        Tuple[str, str]
+            Name of the job and its output directory (as given in the config).
+
+        Raises
+        ------
+        KeyError
+            If neither the config nor its included configs contain a `Job` block.
+        """
+        self._parse_config(config, need_systs=self.split_systs)
+        parse_result = self._parse_cache[(config, self.split_systs)]
+
+        if parse_result["job_name"] is None:
+            raise KeyError(f"No Job block found in '{config}' (or its included configs)!")
+
+        output_dir = parse_result["output_dir"]
+        if output_dir is None:
+            output_dir = "./"  # TRExFitter default if no OutputDir is given
+
+        return parse_result["job_name"], output_dir
+
+    def _write_merge_bash(self, script_path: str) -> None:
+        """Writes bash-script merging split histograms with `hupdate` on HTCondor
+
+        Parameters
+        ----------
+        script_path : str
+            Filepath of the bash-script to be generated.
+        """
+        parts = [
+            "#!/bin/bash\n\n",
+            "histos=${1:?Histogram file prefix should be supplied as the first parameter but was not!}\n",
+            "\n",
+            # Output directories are relative to the configs, as for the TRExFitter jobs
+            f"cd {self.config_dir}\n",
+            self._get_trex_setup("hupdate.exe"),
+            # Merge the outputs of all systematics jobs of the region into the main histogram file
+            "hupdate.exe ${histos}.root ${histos}_*.root\n",
+        ]
+
+        with open(script_path, "w") as f:
+            f.write("".join(parts))
+
+        os.chmod(
+            script_path,
+            stat.S_IRWXU | stat.S_IRGRP | stat.S_IXGRP | stat.S_IROTH | stat.S_IXOTH,
+        )
+
+    def _build_merge_dag(
+        self,
+        dag_path: str,
+        job_file: str,
+        script_path: str,
+    ) -> None:
+        """Generates a DAG running the split jobs followed by per-region merge jobs
+
+        Each line of `job_file` becomes a node of the DAG. Once all nodes of a
+        region have finished, a child node merges their histograms with `hupdate`.
+        Failed nodes can then be retried via the rescue DAG written by DAGMan.
+
+        Parameters
+        ----------
+        dag_path : str
+            Filepath of the DAG file to be generated.
+        job_file : str
+            Filepath of the file containing argument information for the
+            individual jobs (in `syst` granularity).
+        script_path : str
+            Filepath of the bash-script to be executed for the individual jobs.
+        """
+        # Group the jobs by region first, and look up where the histograms of each config end up before writing
+        # anything (so no DAG files are left behind if that fails)
+        with open(job_file) as jobs:
+            job_lines = [line.split() for line in jobs]
+
+        region_nodes = {}
+        for index, (config, short_config, region, suffix, systs) in enumerate(job_lines):
+            region_nodes.setdefault((config, short_config, region), []).append(f"{self.actions}_{index:05d}")
+
+        job_infos = {config: self._get_job_info(config) for config, _, _ in region_nodes}
+
+        node_submit_file = os.path.join(self.script_dir, f"submit_{self.actions}_node.sub")
+        merge_script_file = os.path.join(self.script_dir, f"merge_{self.actions}.sh")
+        merge_submit_file = os.path.join(self.script_dir, f"merge_{self.actions}.sub")
+
+        self._write_htc_submit(
+            submit_file_path=node_submit_file,
+            script_path=script_path,
+            job_file=None,
+            log_dir=self.log_dir,
+            granularity="syst",
+            run_time=self.run_time,
         )
-        err_path = os.path.join(
-            log_dir,
-            f"TRExFitter.{self.actions}.$(ClusterId).$(ProcId).{log_job_options}.err",
+        self._write_merge_bash(script_path=merge_script_file)
+        self._write_htc_submit(
+            submit_file_path=merge_submit_file,
+            script_path=merge_script_file,
+            job_file=None,
+            log_dir=self.log_dir,
+            granularity="merge",
+            log_tag=f"{self.actions}_merge",
         )
 
-        with open(submit_file_path, "w") as f:
-            f.write(f"universe = {universe}\n")
-            f.write(f"executable = {script_path}\n")
-            f.write(f"arguments = {submit_arg_string}\n\n")
+        with open(dag_path, "w") as f:
+            for index, (config, short_config, region, suffix, systs) in enumerate(job_lines):
+                node = f"{self.actions}_{index:05d}"
+                f.write(f"JOB {node} {node_submit_file}\n")
+                f.write(
+                    f'VARS {node} Config="{config}" ShortConfig="{short_config}" '
+                    f'Region="{region}" Suffix="{suffix}" Systematics="{systs}"\n'
+                )
 
             f.write("\n")
-            f.write(f"log = {log_path}\n")
-            f.write(f"output = {out_path}\n")
-            f.write(f"error = {err_path}\n\n")
-
-            # Only transfer files if needed
-            if result_dir is not None:
-                f.write("\n")
-                f.write(f"initialdir = {result_dir}\n")
-                f.write("should_transfer_files = YES\n")
-                f.write("when_to_transfer_output = ON_EXIT\n\n")
-
-            # Add explicitly supplied requirements
-            if run_time is not None:
-                # Not sure if this is a standard requirement as mandated by HTCondor...
-                f.write(f"+RequestRuntime = {run_time:d}\n")
-            if num_cpu is not None:
-                f.write(f"RequestCpus = {num_cpu:d}\n")
-            f.write('requirements = (OpSysAndVer =?= "CentOS7")\n\n')
-
-            # Finally, add job queue statement (with arguments read in from `job_file`)
-            f.write(f"queue {', '.join(job_file_args)} from {job_file}\n")
+            for (config, short_config, region), nodes in region_nodes.items():
+                job_name, output_dir = job_infos[config]
+                histo_prefix = os.path.join(
+                    output_dir, job_name, "Histograms", f"{job_name}_{region}_histos"
+                )
+
+                merge_node = f"merge_{short_config}_{region}"
+                f.write(f"JOB {merge_node} {merge_submit_file}\n")
+                f.write(
+                    f'VARS {merge_node} ShortConfig="{short_config}" Region="{region}" '
+                    f'HistoPrefix="{histo_prefix}"\n'
+                )
+                f.write(f"PARENT {' '.join(nodes)} CHILD {merge_node}\n")
 
     # Arguments supplied to batch-system scripts for different granularities (have to be listed in a job-file then)
     GRANULARITY_ARGS = {
         "global": {
-            "job_file": ["Config", "ShortConfig"],
-            "script_args": ["Config"],
-            "log_args": ["ShortConfig"],
+            "job_file": ("Config", "ShortConfig"),
+            "script_args": ("Config",),
+            "log_args": ("ShortConfig",),
         },
         "region": {
-            "job_file": ["Config", "ShortConfig", "Region"],
-            "script_args": ["Config", "Region"],
-            "log_args": ["ShortConfig", "Region"],
+            "job_file": ("Config", "ShortConfig", "Region"),
+            "script_args": ("Config", "Region"),
+            "log_args": ("ShortConfig", "Region"),
         },
         "syst": {
-            "job_file": ["Config", "ShortConfig", "Region", "Suffix", "Systematics"],
-            "script_args": ["Config", "Region", "Suffix", "Systematics"],
-            "log_args": ["ShortConfig", "Region", "Suffix"],
+            "job_file": ("Config", "ShortConfig", "Region", "Suffix", "Systematics"),
+            "script_args": ("Config", "Region", "Suffix", "Systematics"),
+            "log_args": ("ShortConfig", "Region", "Suffix"),
         },
         "ranking": {
-            "job_file": ["Config", "ShortConfig", "Suffix", "Systematics"],
-            "script_args": ["Config", "Systematics"],
-            "log_args": ["ShortConfig", "Suffix"],
+            "job_file": ("Config", "ShortConfig", "Suffix", "Systematics"),
+            "script_args": ("Config", "Systematics"),
+            "log_args": ("ShortConfig", "Suffix"),
         },
         "lhscan": {
-            "job_file": ["Config", "ShortConfig", "Step"],
-            "script_args": ["Config", "Step"],
-            "log_args": ["ShortConfig", "Step"],
+            "job_file": ("Config", "ShortConfig", "Step"),
+            "script_args": ("Config", "Step"),
+            "log_args": ("ShortConfig", "Step"),
+        },
+        # Only used for the hupdate jobs in DAGs, the arguments are defined per node
+        "merge": {
+            "job_file": ("ShortConfig", "Region", "HistoPrefix"),
+            "script_args": ("HistoPrefix",),
+            "log_args": ("ShortConfig", "Region"),
         },
     }
 
+    # Bash-script run by the TRExFitter jobs
+    BATCH_SCRIPT_TEMPLATE = (
+        "#!/bin/bash\n\n"
+        # Get config (and region and systematic, if applicable), complain if we cannot
+        "config=${{1:?Config should be supplied as the first parameter but was not!}}\n"
+        "{job_params}"
+        "\n"
+        # Make the relative config paths work for us
+        "cd {config_dir}\n"
+        "{trex_setup}"
+        # We should now have `trex-fitter` in our PATH, so can simply call it directly
+        'trex-fitter {actions} ${{config}} "{option_string}"\n'
+        "pwd\n"
+        "ls -l\n"
+    )
+
+    # Job parameters read in by the bash-script beyond the config and the TRExFitter options making use of them
+    BATCH_SCRIPT_ARGS = {
+        "global": {
+            "params": "",
+            "options": (),
+        },
+        "region": {
+            "params": "region=${2:?Region should be supplied as the second parameter but was not!}\n",
+            "options": ("Regions=${region}",),
+        },
+        "syst": {
+            "params": (
+                "region=${2:?Region should be supplied as the second parameter but was not!}\n"
+                "suffix=${3:?Suffix should be supplied as the third parameter but was not!}\n"
+                "systs=${4:?Systematics should be supplied as the fourth parameter but were not!}\n"
+            ),
+            "options": ("Regions=${region}", "Systematics=${systs}", "SaveSuffix=_${suffix}"),
+        },
+        "ranking": {
+            "params": "systs=${2:?Systematics should be supplied as the second parameter but were not!}\n",
+            "options": ("Ranking=${systs}",),
+        },
+        "lhscan": {
+            "params": "steps=${2:?Step should be supplied as the second parameter but was not!}\n",
+            "options": ("LHscanStep=${steps}",),
+        },
+    }
+
+    # Optional settings are filled in as complete lines (or left empty)
+    SUBMIT_TEMPLATE = (
+        "universe = {universe}\n"
+        "executable = {executable}\n"
+        "arguments = {arguments}\n\n"
+        "\n"
+        "log = {log}\n"
+        "output = {output}\n"
+        "error = {error}\n\n"
+        "{transfer_settings}"
+        "{resource_requests}"
+        "{getenv_setting}"
+        'requirements = (OpSysAndVer =?= "CentOS7")\n\n'
+        # Group all jobs of this submission in `condor_q`
+        "batch_name = {batch_name}\n"
+        "{materialize_setting}"
+        "\n"
+        "{queue_statement}\n"
+    )
+
     SUB_DIRS = {
         "scripts": "scripts",
         "logs": "logs",
@@ -1309,6 +2047,41 @@ class TRExSubmit:
         "results": "results",
     }
 
+    # Number of jobs per submission when rate-limiting the submission
+    RATE_LIMIT_CHUNK_SIZE = 500
+
+    # Regex expressions for parsing configs, compiled once on import
+    # Rep-file: Take everything up to comments and trim whitespace in the path, disregard quotes
+    FILE_REGEX = re.compile(
+        "^\s*(?P<key>[\w-]+)\s*:\s*(?P<value>[^#%]*[^\s#%])[\s#%]*"  # noqa W605
+    )
+    # Other keys: Allow quote-escaping of value and add key and quote groups with logic for retrieval
+    KEY_REGEX = re.compile(
+        '^\s*(?P<key>[\w-]+)\s*:\s*(?P<quote>")?'                        # noqa W605
+        '(?P<value>(?(quote)[^"]+|[^"#%]*[^"\s#%]))(?(quote)"|)[\s#%]*'  # noqa W605
+    )
+    # Config parser: Scan the whole (binary) config at once for all keys holding regions, systematics, nested
+    # configs, the likelihood scan steps or the job name and output directory, taking everything up to comments
+    # as the value
+    CONFIG_SCAN_REGEX = re.compile(
+        rb"^[ \t]*(?P<key>Region|Systematic|UnfoldingSystematic|NuisanceParameter|NormFactor|INCLUDE|ConfigFile"
+        rb"|LHscanSteps|Job|OutputDir)"
+        rb"[ \t]*:(?P<value>[^%\r\n]*)",
+        re.MULTILINE,
+    )
+    # Block keys: Any unindented key starts a new block of the config
+    BLOCK_REGEX = re.compile(rb"^(?P<key>[\w-]+)[ \t]*:", re.MULTILINE)
+
+    # Format version of the persistent parse cache (to be increased whenever its entries change) and the keys of
+    # its entries (besides the config and whether systematics were gathered, which identify the entry)
+    PARSE_CACHE_VERSION = 4
+    PARSE_CACHE_ENTRY_KEYS = {
+        "regions", "systs", "lhscan_steps", "job_name", "output_dir", "dependencies", "duplicate_systs"
+    }
+
+    # Upper limit on the number of configs parsed concurrently
+    MAX_PARSE_THREADS = 16
+
     CONFIG_KEYS_TO_PATH_CONVERT = [
         "OutputDir",
         "InputFolder",
@@ -1419,6 +2192,42 @@ if __name__ == "__main__":
         help="Instructs TRExFitter to carry out the 'x' action in multiple jobs for each step of the likelihood scan, specified in the config file.",
     )
 
+    parser.add_argument(
+        "--strict",
+        action="store_true",
+        dest="strict",
+        help="Abort instead of only warning if a config lists the same systematic more than once within a single "
+        "entry (e.g. `Systematic: A;B;A`).",
+    )
+
+    parser.add_argument(
+        "--max-materialize",
+        metavar="NUM_JOBS",
+        type=int,
+        default=None,
+        dest="max_materialize",
+        help="Let the schedd materialize at most this many jobs at once instead of all of them at submission. "
+        "Useful for large submissions (Does not apply to the jobs of a DAG).",
+    )
+
+    parser.add_argument(
+        "--max-jobs-per-second",
+        metavar="RATE",
+        type=float,
+        default=None,
+        dest="max_jobs_per_second",
+        help="Submit jobs in chunks spaced such that at most this many jobs per second reach the schedd. "
+        "Does not apply to DAGs, for which DAGMan throttles the submission itself.",
+    )
+
+    parser.add_argument(
+        "--getenv",
+        action="store_true",
+        dest="getenv",
+        help="Let the jobs inherit the environment of the submission. If TRExFitter was already set up before "
+        "submitting, the jobs then skip sourcing its setup script.",
+    )
+
     job_split_procedure = parser.add_mutually_exclusive_group()
     job_split_procedure.add_argument(
         "--single-reg",
@@ -1449,6 +2258,9 @@ if __name__ == "__main__":
 
     args = parser.parse_args()
 
+    if args.max_jobs_per_second is not None and args.max_jobs_per_second <= 0:
+        parser.error("argument --max-jobs-per-second: the submission rate has to be positive")
+
     if (
         not args.used_configs
     ):  # Make it explicit that all configs will be used if none are given as parameters
@@ -1466,6 +2278,10 @@ if __name__ == "__main__":
         num_syst_per_job=args.num_nps_per_job,
         extra_opts=args.trex_options,
         run_time=args.run_time,
+        strict=args.strict,
+        max_materialize=args.max_materialize,
+        max_jobs_per_second=args.max_jobs_per_second,
+        getenv=args.getenv,
     )
 
     if args.actions is None:
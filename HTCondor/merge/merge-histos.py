@@ -22,6 +22,13 @@ Usage:
     - automatically compile TRExFitter with input path
     - more error handling
 
+- v1.2 Added features:
+    - yaml config file taken from the `--config` option, its parsed content is cached next to it as json
+    - yaml parsed with libyaml (if available)
+    - `default` systematics block as fallback, script usable as a module via `main()`
+    - hupdate merges run in parallel (`--jobs`)
+    - histograms already merged (and unchanged since) are skipped, unless `--force` is given
+
  TODO: Nice to haves:
     - some auto generation of .yaml configs used, link to Condor script for n Job submission perhaps?
     - the script getSystList.py can be used here
@@ -29,106 +36,207 @@ Usage:
 """
 
 import os
+import json
 import subprocess
 import yaml
 import argparse
 import sys
+from concurrent.futures import ThreadPoolExecutor
 
-# Define command-line options
-parser = argparse.ArgumentParser(description='Merge TRExFitter histograms when split by region and systematics')
-parser.add_argument('-c','--config', type=os.path.abspath,
-                    help='path to merging YAML config file to use')
-parser.add_argument('-s','--systematics', type=str, choices=['stxs', 'inc'], default='stxs',
-                    help='which block of systematics to use (default: %(default)s)')
-parser.add_argument('-d', '--directory', type=str,
-                    help='the path to the directory containing the .root Histograms to be merged')
-parser.add_argument('-t', '--trexfitter-path', type=str,
-                    help='the path to the TRExFitter top directory')
-
-# Print usage instructions if no arguments are provided
-if len(sys.argv) == 1:
-    parser.print_help()
-    sys.exit(0)
-
-args = parser.parse_args()
-
-# Set up TRExFitter environment
-if args.trexfitter_path is not None:
-    trexfitter_setup_script = os.path.join(args.trexfitter_path, 'setup.sh')
-    if os.path.isfile(trexfitter_setup_script):
-        subprocess.run(f"source {trexfitter_setup_script}", shell=True, check=True)
-    else:
-        print("\033[91mError: TRExFitter setup script (setup.sh) not found. Please ensure the correct path is provided.\033[0m")
-        sys.exit(1)
-else:
-    print("\033[91mError: Please provide the path to the TRExFitter installation directory using the -t or --trexfitter-path option.\033[0m")
-    sys.exit(1)
+# Prefer the libyaml-based loader, which parses in C, but keep working without libyaml
+try:
+    from yaml import CSafeLoader as YamlLoader
+except ImportError:
+    from yaml import SafeLoader as YamlLoader
 
-# Read the YAML file
-with open('merge_1l.yaml', 'r') as file:
-    file_paths = yaml.safe_load(file)
 
-# Get the input file paths from the YAML file, with error handling
-try:
-    input_files = [os.path.join(args.directory, file) for file in file_paths['input_files']]
-except KeyError:
-    print("Error: 'input_files' key not found in merge.yaml")
-    exit(1)
+def load_yaml_cached(path):
+    """Load a YAML file, re-using a JSON copy of its content while the file is unchanged
 
+    The parsed content is stored next to the YAML file as `.<name>.cache.json` together
+    with the modification time of the YAML file, as JSON is much faster to load than YAML.
+    """
+    cache_path = os.path.join(os.path.dirname(path), f".{os.path.basename(path)}.cache.json")
+    mtime = os.stat(path).st_mtime_ns
 
-# Get the baseline output file paths from the YAML file, with error handling
-try:
-    baseline_output_files = [os.path.join(args.directory, file) for file in file_paths['baseline_output_files']]
-except KeyError:
-    print("Error: 'baseline_output_files' key not found in merge_1l_inclusive.yaml")
-    exit(1)
+    try:
+        with open(cache_path, 'r') as cache_file:
+            cache = json.load(cache_file)
+        if cache['mtime'] == mtime:
+            return cache['content']
+    except (OSError, ValueError, KeyError, TypeError):
+        pass  # No (valid) cache yet, so parse the YAML file below
+
+    if YamlLoader is yaml.SafeLoader:
+        print("\033[93mWarning: libyaml is not available, parsing the YAML file with the slower pure-python loader\033[0m")
+    with open(path, 'r') as file:
+        content = yaml.load(file, Loader=YamlLoader)
+
+    # Not being able to write the cache (e.g. read-only directory) only costs us the speed-up next time
+    try:
+        with open(cache_path, 'w') as cache_file:
+            json.dump({'mtime': mtime, 'content': content}, cache_file)
+    except OSError:
+        pass
+
+    return content
+
+
+# Suffix of the (empty) files marking histogram files as merged
+MERGED_STAMP_SUFFIX = '.merged'
+
+
+def run_hupdate(hupdate_cmd):
+    """Run a single hupdate command (given as argument list), raising if it fails
+
+    Afterwards, the merged file (the first file argument) is marked as merged, see `is_merge_up_to_date`.
+    """
+    print(' '.join(hupdate_cmd))
+    subprocess.run(hupdate_cmd, check=True)
+
+    # (Re-)create the stamp only now, so its modification time is newer than all merged files
+    with open(hupdate_cmd[1] + MERGED_STAMP_SUFFIX, 'w'):
+        pass
+
+
+def is_merge_up_to_date(input_file, output_files):
+    """Check whether `output_files` were already merged into `input_file` and none of them changed since
 
-# Get the list of systematics from the YAML file based on the command-line option
-if args.systematics == 'stxs':
+    This is the case if the stamp written after the last merge is at least as new as all of the files.
+    """
     try:
-        systematics = file_paths['systematics_STXS']
+        stamp_mtime = os.stat(input_file + MERGED_STAMP_SUFFIX).st_mtime_ns
+        newest_mtime = os.stat(input_file).st_mtime_ns
+    except FileNotFoundError:
+        return False
+
+    for output_file in output_files:
+        try:
+            newest_mtime = max(newest_mtime, os.stat(output_file).st_mtime_ns)
+        except FileNotFoundError:
+            pass  # Missing files cannot have changed since the last merge
+
+    return stamp_mtime >= newest_mtime
+
+
+# Keys of the systematics blocks in the YAML file selectable via `--systematics`
+SYSTEMATICS_KEYS = {
+    'stxs': 'systematics_STXS',
+    'inc': 'systematics_inc',
+    'default': 'systematics',
+}
+
+
+def main(argv=None):
+    """Merge the histograms split by region and systematic with `hupdate`
+
+    `argv` are the command-line arguments (without the program name), by default taken from `sys.argv`.
+    """
+    argv = sys.argv[1:] if argv is None else argv
+
+    # Define command-line options
+    parser = argparse.ArgumentParser(description='Merge TRExFitter histograms when split by region and systematics')
+    parser.add_argument('-c','--config', type=os.path.abspath, default='merge_1l.yaml',
+                        help='path to merging YAML config file to use (default: %(default)s)')
+    parser.add_argument('-s','--systematics', type=str, choices=list(SYSTEMATICS_KEYS), default='stxs',
+                        help='which block of systematics to use, falls back to the plain `systematics` block if the '
+                             'selected one is not defined (default: %(default)s)')
+    parser.add_argument('-d', '--directory', type=str,
+                        help='the path to the directory containing the .root Histograms to be merged')
+    parser.add_argument('-t', '--trexfitter-path', type=str,
+                        help='the path to the TRExFitter top directory')
+    parser.add_argument('-f', '--force', action='store_true',
+                        help='merge all histograms, even if they were already merged and did not change since')
+    parser.add_argument('-j', '--jobs', type=int, default=os.cpu_count() or 1,
+                        help='number of hupdate merges to run in parallel (default: %(default)s)')
+
+    # Print usage instructions if no arguments are provided
+    if not argv:
+        parser.print_help()
+        sys.exit(0)
+
+    args = parser.parse_args(argv)
+
+    # Set up TRExFitter environment
+    if args.trexfitter_path is not None:
+        trexfitter_setup_script = os.path.join(args.trexfitter_path, 'setup.sh')
+        if os.path.isfile(trexfitter_setup_script):
+            subprocess.run(f"source {trexfitter_setup_script}", shell=True, check=True)
+        else:
+            print("\033[91mError: TRExFitter setup script (setup.sh) not found. Please ensure the correct path is provided.\033[0m")
+            sys.exit(1)
+    else:
+        print("\033[91mError: Please provide the path to the TRExFitter installation directory using the -t or --trexfitter-path option.\033[0m")
+        sys.exit(1)
+
+    # Check if the directory option is provided
+    if args.directory is None:
+        print("Error: Please provide the directory path with the Histograms to be merged using the --directory option.")
+        sys.exit(1)
+
+    # Read the YAML file (or its cached content if it did not change since the last merge)
+    file_paths = load_yaml_cached(args.config)
+    config_name = os.path.basename(args.config)
+
+    # Get the input file paths from the YAML file, with error handling
+    try:
+        input_files = [os.path.join(args.directory, file) for file in file_paths['input_files']]
     except KeyError:
-        print("Error: 'systematics_STXS' key not found in merge.yaml")
-        exit(1)
-elif args.systematics == 'inc':
+        print(f"Error: 'input_files' key not found in {config_name}")
+        sys.exit(1)
+
+    # Get the baseline output file paths from the YAML file, with error handling
     try:
-        systematics = file_paths['systematics_inc']
+        baseline_output_files = [os.path.join(args.directory, file) for file in file_paths['baseline_output_files']]
     except KeyError:
-        print("Error: 'systematics_inc' key not found in merge.yaml")
-        exit(1)
-else:
-    print("Error: Invalid option for '--systematics'. Must be 'STXS' or 'inc'")
-    exit(1)
+        print(f"Error: 'baseline_output_files' key not found in {config_name}")
+        sys.exit(1)
 
-# Check if the directory option is provided
-if args.directory is None:
-    print("Error: Please provide the directory path with the Histograms to be merged using the --directory option.")
-    exit(1)
+    # Get the list of systematics from the YAML file based on the command-line option
+    systematics_key = SYSTEMATICS_KEYS[args.systematics]
+    systematics = file_paths.get(systematics_key, file_paths.get(SYSTEMATICS_KEYS['default']))
+    if systematics is None:
+        tried_keys = ' or '.join(f"'{key}'" for key in dict.fromkeys((systematics_key, SYSTEMATICS_KEYS['default'])))
+        print(f"Error: {tried_keys} key not found in {config_name}")
+        sys.exit(1)
 
-# Set the working directory to the provided directory path
-os.chdir(args.directory)
+    # Set the working directory to the provided directory path
+    os.chdir(args.directory)
 
-# Loop through the input files and baseline output files and generate the output filenames
-for input_file, baseline_output_file in zip(input_files, baseline_output_files):
-    # Initialize the list of output files
-    output_files = []
+    # Define the command
+    hupdate_exe = "/scratch4/levans/TRExFitter_v4.17/TRExFitter/build/bin/hupdate.exe"
 
-    # Loop through the list of systematics and generate the output filenames
-    for systematic in systematics:
-        # Format the output filename with the systematic
-        output_file = baseline_output_file.format(systematic)
+    # Loop through the input files and baseline output files and generate the merge commands
+    hupdate_cmds = []
+    for input_file, baseline_output_file in zip(input_files, baseline_output_files):
+        # Initialize the list of output files
+        output_files = []
 
-        # Append the output file to the list of output files
-        output_files.append(output_file)
+        # Loop through the list of systematics and generate the output filenames
+        for systematic in systematics:
+            # Format the output filename with the systematic
+            output_file = baseline_output_file.format(systematic)
 
-    # Join the list of output files as a single string
-    output_files_str = ' '.join(output_files)
+            # Append the output file to the list of output files
+            output_files.append(output_file)
+
+        # Re-running the merge would only re-do the same ROOT I/O, so skip it unless anything changed
+        if not args.force and is_merge_up_to_date(input_file, output_files):
+            print(f"Skipping {input_file}, already merged and up to date")
+            continue
+
+        # Pass the file names as separate arguments, no need for a shell to split them up again
+        hupdate_cmds.append([hupdate_exe, input_file, *output_files])
+
+    # Every command merges into a different file, so they are independent and are I/O bound on reading the
+    # histogram files - run them in parallel (a failing merge still aborts the script)
+    num_workers = max(1, min(args.jobs, len(hupdate_cmds)))
+    with ThreadPoolExecutor(max_workers=num_workers) as executor:
+        for _ in executor.map(run_hupdate, hupdate_cmds):
+            pass
+
+    print("\033[92mAll histograms merged, happy fitting!\033[0m")
 
-    # Define the command
-    exec = "/scratch4/levans/TRExFitter_v4.17/TRExFitter/build/bin/hupdate.exe"
-    hupdate_cmd = f"{exec} {input_file} {output_files_str}"
-    print(hupdate_cmd)
-    # Run the hupdate command in the terminal
-    subprocess.run(hupdate_cmd, shell=True, check=True)
 
-print("\033[92mAll histograms merged, happy fitting!\033[0m")
\ No newline at end of file
+if __name__ == '__main__':
+    main()
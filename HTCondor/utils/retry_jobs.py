@@ -2,7 +2,9 @@
 
 import os
 import re
+import mmap
 import argparse
+from concurrent.futures import ThreadPoolExecutor
 
 """
 =========================
@@ -32,6 +34,12 @@ ERROR_MESSAGES = [
     "ERROR::SampleHist::SmoothSyst",
 ]
 
+# Upper limit on the number of log files scanned concurrently
+MAX_SCAN_THREADS = 32
+
+# Log files up to this size (in bytes) are read in one go instead of being memory-mapped
+SMALL_FILE_SIZE = 64 * 1024
+
 
 def _clear_log_file(output_log):
     # Open the log file
@@ -54,6 +62,7 @@ class CondorJobHandler:
         new_args_file,
         steps,
         additional_errors=None,
+        context_lines=10,
     ) -> None:
         """
         Initialises a CondorJobHandler object with the given directory, output log file,
@@ -66,6 +75,9 @@ class CondorJobHandler:
         - new_args_file (str): The path/name of the new arguments file to be created for retrying
           the failed jobs.
         - steps (str): The trex-fitter step used.
+        - additional_errors (list): Additional error messages to check for in the job output logs.
+        - context_lines (int): The number of lines around the first error of a log to write to the
+          output log file. If None or negative, the whole log contents are written.
         """
         self.directory = directory
         self.output_log = output_log
@@ -73,37 +85,147 @@ class CondorJobHandler:
         self.new_args_file = new_args_file
         self.steps = steps
         self.additional_errors = additional_errors or []
+        self.context_lines = context_lines
+        # Search all error messages at once with a single (binary) regex instead of one substring scan per message
+        self.error_regex = re.compile(
+            b"|".join(
+                re.escape(error.encode()) for error in ERROR_MESSAGES + self.additional_errors
+            )
+        )
+        # Log file names of failed jobs (only depends on the step, so compile it once)
+        self.failed_job_regex = re.compile(
+            r"TRExFitter\." + re.escape(self.steps) + r"\.\d+\.\d+\.(config_.+?)\.err"
+        )
 
-    def check_errors(self) -> None:
+    def check_errors(self):
         """
         Checks the condor logs for errors in the jobs and writes any error messages
         to the user specified output log file.
+
+        Returns:
+        - list: The names of the log files containing errors.
+        """
+        # The directory entries already know their names and types, no need for an extra stat call per file
+        with os.scandir(self.directory) as entries:
+            error_files = [
+                (entry.name, entry.path)
+                for entry in entries
+                if entry.name.endswith(".err") and entry.is_file()
+            ]
+
+        # Reading the logs is dominated by file access latency (e.g. on network filesystems), so keep many reads
+        # in flight at once
+        num_threads = max(1, min(MAX_SCAN_THREADS, len(error_files)))
+        with ThreadPoolExecutor(max_workers=num_threads) as executor:
+            scan_results = executor.map(
+                lambda error_file: self._scan_error_file(error_file[1]), error_files
+            )
+
+            # Only write to the output log from this thread (and only open it once for all failed jobs)
+            matched_filenames = []
+            with open(self.output_log, "a", buffering=1 << 20) as output_file:
+                for (filename, _), contents in zip(error_files, scan_results):
+                    if contents is not None:
+                        # Hand the pieces to the (buffered) log as they are, no need to build one big string first
+                        output_file.writelines(("File: ", filename, "\nContents:\n", contents, "\n\n"))
+                        matched_filenames.append(filename)
+
+        return matched_filenames
+
+    def _scan_error_file(self, path):
+        """
+        Checks a single condor log for errors in the job.
+
+        Args:
+        - path (str): The path to the log file.
+
+        Returns:
+        - str or None: The contents of the log (or the lines around the first error, see `context_lines`)
+          if it contains any of the error messages, None otherwise.
+        """
+        # Use the plain file descriptor, there is no need for a buffered file object around it
+        fd = os.open(path, os.O_RDONLY)
+        try:
+            size = os.fstat(fd).st_size
+            # Empty files cannot be mapped (and cannot contain any errors either)
+            if size == 0:
+                return None
+            # Most logs are tiny, so a single read is cheaper than setting up a mapping
+            if size <= SMALL_FILE_SIZE:
+                return self._search_errors(os.read(fd, size))
+            # Map larger files instead of copying them into a string, we only need the contents on a match
+            with mmap.mmap(fd, 0, access=mmap.ACCESS_READ) as contents:
+                return self._search_errors(contents)
+        finally:
+            os.close(fd)
+
+    def _search_errors(self, contents):
         """
-        # Loop over error files in the directory
-        for filename in os.listdir(self.directory):
-            error_messages = ERROR_MESSAGES + self.additional_errors
-            if filename.endswith(".err"):
-                with open(os.path.join(self.directory, filename), "r") as file:
-                    contents = file.read()
-                    # Check for the user-specified errors in the file contents
-                    if any(error in contents for error in error_messages):
-                        output_str = f"File: {filename}\nContents:\n{contents}\n\n"
-                        with open(self.output_log, "a") as output_file:
-                            output_file.write(output_str)
+        Checks the contents of a single condor log for errors in the job.
 
-    def extract_failed_jobs(self):
+        Args:
+        - contents (bytes or mmap): The contents of the log.
+
+        Returns:
+        - str or None: See `_scan_error_file`.
+        """
+        # Check for the user-specified errors in the file contents
+        match = self.error_regex.search(contents)
+        if match is not None:
+            return self._get_error_context(contents, match)
+        return None
+
+    def _get_error_context(self, contents, match):
+        """
+        Cuts the lines around an error out of the contents of a log.
+
+        Args:
+        - contents (bytes or mmap): The contents of the log.
+        - match (re.Match): The match of the error in the contents.
+
+        Returns:
+        - str: The `context_lines` lines before and after the line of the error (and the line itself),
+          with omitted parts marked by `[...]`, or the whole contents if `context_lines` is None or negative.
         """
-        Extracts the names of the failed jobs from the created output log file.
+        if self.context_lines is None or self.context_lines < 0:
+            return contents[:].decode(errors="replace")
+
+        # Go back to the start of the line `context_lines` lines before the error
+        start = match.start()
+        for _ in range(self.context_lines + 1):
+            start = contents.rfind(b"\n", 0, start)
+            if start == -1:
+                break
+        start += 1  # Also works out if we reached the start of the file
+
+        # Go forward to the end of the line `context_lines` lines after the error
+        end = match.end() - 1
+        for _ in range(self.context_lines + 1):
+            end = contents.find(b"\n", end + 1)
+            if end == -1:
+                end = len(contents)
+                break
+
+        context = contents[start:end].decode(errors="replace")
+        if start > 0:
+            context = "[...]\n" + context
+        if end < len(contents) - 1:
+            context += "\n[...]"
+        return context
+
+    def extract_failed_jobs(self, matched_filenames):
+        """
+        Extracts the names of the failed jobs from the names of the log files containing errors.
+
+        Args:
+        - matched_filenames (list): The names of the log files containing errors, as returned
+          by `check_errors` (no need to read them back from the output log file).
         """
         # Create an empty list to store the failed jobs
         failed_jobs = []
 
-        with open(self.output_log, "r") as f:
-            lines = f.readlines()
-        for line in lines:
-            match = re.search(
-                r"TRExFitter\." + self.steps + r"\.\d+\.\d+\.(config_.+?)\.err", line
-            )
+        for filename in matched_filenames:
+            match = self.failed_job_regex.search(filename)
             if match:
                 failed_job = match.group(1)
                 # Ensure the job name is a separate string
@@ -121,18 +243,20 @@ class CondorJobHandler:
         Creates a new arguments file for retrying the failed jobs.
         """
 
-        with open(self.original_args_file, "r") as f:
-            lines = f.readlines()
-
-        with open(self.new_args_file, "w") as f:
-            for job in failed_jobs:
-                # Replace the dot in the job name with a space to match the args file format
-                formatted_job = job.replace(".", " ")
-                for line in lines:
+        # The job names in the logs are the job arguments following the config path, joined by dots - so split
+        # them into the same fields as the args file lines for hash lookups (a set also drops jobs found more
+        # than once)
+        formatted_jobs = {tuple(job.split(".")) for job in failed_jobs}
+        # All jobs of one submission have the same number of fields, but do not rely on that
+        job_lengths = {len(job) for job in formatted_jobs}
+
+        # Stream through the arguments only once, writing each line of a failed job once (in the original order)
+        with open(self.original_args_file, "r") as args_f, open(self.new_args_file, "w") as f:
+            for line in args_f:
+                fields = line.split()
+                if any(tuple(fields[1:1 + length]) in formatted_jobs for length in job_lengths):
                     # stripe the newline character from the line
-                    line = line.rstrip("\n")
-                    if formatted_job in line:
-                        f.write(line + "\n")
+                    f.write(line.rstrip("\n") + "\n")
         print(f"New arguments file created: {self.new_args_file}")
         print(
             "Please, copy the new arguments file to the base directory of the condor workspace"
@@ -144,8 +268,8 @@ class CondorJobHandler:
         and creating a new arguments file for retrying the failed jobs.
         """
 
-        self.check_errors()
-        failed_jobs = self.extract_failed_jobs()
+        matched_filenames = self.check_errors()
+        failed_jobs = self.extract_failed_jobs(matched_filenames)
         self.create_new_args_file(failed_jobs)
 
 
@@ -202,12 +326,27 @@ if __name__ == "__main__":
         "Can be specified multiple times.",
     )
 
+    parser.add_argument(
+        "-c",
+        "--context-lines",
+        type=int,
+        default=10,
+        help="The number of lines before and after the first error of a job to write to the output log file "
+        "(default: %(default)s). Use a negative number to write the whole job output log.",
+    )
+
     args = parser.parse_args()
 
     _clear_log_file(args.output)
 
     handler = CondorJobHandler(
-        args.directory, args.output, args.args, args.newargs, args.steps, args.error
+        args.directory,
+        args.output,
+        args.args,
+        args.newargs,
+        args.steps,
+        args.error,
+        args.context_lines,
     )
 
     handler.handle_failed_jobs()
@@ -3,12 +3,16 @@ import json
 import os
 from rucio.client import Client
 
-def get_folder_from_dsid(dsid, dsid_map):
-    """Given a dsid, return the appropriate folder name based on the dsid_map."""
+def build_dsid_index(dsid_map):
+    """Invert the dsid_map into a dictionary mapping each dsid to its folder name.
+
+    If a dsid is listed for several folders, the first folder is used.
+    """
+    dsid_index = {}
     for folder, dsids in dsid_map.items():
-        if dsid in dsids:
-            return folder
-    return None  # If dsid is not found in the map for some reason
+        for dsid in dsids:
+            dsid_index.setdefault(dsid, folder)
+    return dsid_index
 
 def download_samples(sample_list, rse, login_info=None, nominal_only=False, dsid_map=None):
     """Download samples from Rucio.
@@ -29,26 +33,34 @@ def download_samples(sample_list, rse, login_info=None, nominal_only=False, dsid
     # Initialize the Rucio client
     client = Client(rucio_account=login_info.get('account', 'default_account'), auth_host=login_info.get('auth_host', 'default_auth_host'))
 
+    # Look up folders by dsid directly instead of searching through all folders for every sample
+    dsid_index = build_dsid_index(dsid_map)
+
+    # Read the (non-empty) sample names, dropping duplicates (e.g. from concatenated sample lists) so that
+    # no sample is downloaded twice, while keeping their order
     with open(sample_list, 'r') as f:
-        for sample in f:
-            sample = sample.strip()
-            if not sample:
-                continue
+        samples = list(dict.fromkeys(sample.strip() for sample in f if sample.strip()))
+
+    # Collect the samples to download per folder first, so each folder needs only a single download request
+    groups = {}
+    for sample in samples:
+        # Determine folder based on the DSID
+        dsid = sample.split('.')[1]  # Assuming the DSID is the second part of the sample name...
+        folder = dsid_index.get(dsid)  # None if dsid is not found in the map for some reason
+        if not folder:
+            raise Exception(f"No folder found for DSID {dsid}. Skipping...")
 
-            # Determine folder based on the DSID
-            dsid = sample.split('.')[1]  # Assuming the DSID is the second part of the sample name...
-            folder = get_folder_from_dsid(dsid, dsid_map)
-            if not folder:
-                raise Exception(f"No folder found for DSID {dsid}. Skipping...")
+        destination = os.path.join(folder, sample)
 
-            destination = os.path.join(folder, sample)
+        # Skip non-nominal samples if nominal_only is set to true
+        if nominal_only and not sample.endswith('nominal'):
+            continue
 
-            # Skip non-nominal samples if nominal_only is set to true
-            if nominal_only and not sample.endswith('nominal'):
-                continue
+        groups.setdefault(folder, []).append({'did': sample, 'rse': rse, 'base_dir': destination})
 
-            # Now trigger the download
-            client.download_dids([{'did': sample, 'rse': rse, 'base_dir': destination}])
+    # Now trigger the downloads
+    for items in groups.values():
+        client.download_dids(items)
 
 if __name__ == '__main__':
     parser = argparse.ArgumentParser(description="Download level 1 samples via Rucio.")
@@ -1,13 +1,18 @@
+import mmap
+import os
 import re
+import sys
 
-# Open the text file
-with open('1l_5j3b_ttb.txt', 'r') as file:
-    # Read the contents of the file
-    file_contents = file.read()
+# Regular expression to extract file names, compiled once and matched directly on the raw bytes of the file
+file_name_pattern = re.compile(rb'\w+\.root')
 
-# Use regular expression to extract file names
-file_names = re.findall(r'\w+\.root', file_contents)
-
-# Print the file names
-for file_name in file_names:
-    print(file_name)
+# Open the text file and map it into memory instead of reading it into a string
+with open('1l_5j3b_ttb.txt', 'rb') as file:
+    # An empty file cannot be mapped (and contains no file names anyway)
+    if os.fstat(file.fileno()).st_size > 0:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as contents:
+            # Join the file names straight from the matches (no list of all matches in between) and write
+            # them out at once rather than with one print() per name
+            sys.stdout.buffer.write(
+                b''.join(match.group() + b'\n' for match in file_name_pattern.finditer(contents))
+            )